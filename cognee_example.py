@@ -10,6 +10,7 @@ Configuration is loaded from .env file automatically.
 """
 
 import asyncio
+import os
 from dotenv import load_dotenv
 
 # Load environment variables BEFORE importing cognee
@@ -17,6 +18,9 @@ load_dotenv()
 
 import cognee
 
+# Maximum number of searches sent to Cognee at the same time
+SEARCH_CONCURRENCY = int(os.getenv("COGNEE_SEARCH_CONCURRENCY", "4"))
+
 
 async def main():
     print("=" * 60)
@@ -54,11 +58,10 @@ async def main():
         """,
     ]
 
-    # Add documents to Cognee
+    # Add all documents to Cognee in a single call
     print("\n2. Adding documents to Cognee...")
-    for i, doc in enumerate(documents, 1):
-        await cognee.add(doc.strip())
-        print(f"   Added document {i}/{len(documents)}")
+    await cognee.add([doc.strip() for doc in documents])
+    print(f"   Added {len(documents)} documents")
     print("   Done!")
 
     # Process documents into knowledge graph
@@ -78,31 +81,36 @@ async def main():
         "What companies did Bob Smith work for before?",
     ]
 
-    for query in queries:
+    # Run the searches concurrently, a few at a time
+    semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+
+    async def answer(query):
+        async with semaphore:
+            try:
+                results = await cognee.search(query)
+            except Exception as e:
+                return f"Error during search - {e}"
+        if not results:
+            return "No results found"
+
+        # Handle different result formats
+        result = results[0]
+        if isinstance(result, str):
+            return result
+        elif hasattr(result, 'text'):
+            return result.text
+        elif isinstance(result, dict):
+            # Cognee returns search_result key with list of answers
+            search_result = result.get('search_result', [])
+            if search_result:
+                return search_result[0] if isinstance(search_result, list) else search_result
+            return str(result)
+        return str(result)
+
+    answers = await asyncio.gather(*(answer(query) for query in queries))
+    for query, query_answer in zip(queries, answers):
         print(f"\nQ: {query}")
-        try:
-            results = await cognee.search(query)
-            if results:
-                # Handle different result formats
-                result = results[0]
-                if isinstance(result, str):
-                    answer = result
-                elif hasattr(result, 'text'):
-                    answer = result.text
-                elif isinstance(result, dict):
-                    # Cognee returns search_result key with list of answers
-                    search_result = result.get('search_result', [])
-                    if search_result:
-                        answer = search_result[0] if isinstance(search_result, list) else search_result
-                    else:
-                        answer = str(result)
-                else:
-                    answer = str(result)
-                print(f"A: {answer}")
-            else:
-                print("A: No results found")
-        except Exception as e:
-            print(f"A: Error during search - {e}")
+        print(f"A: {query_answer}")
 
     print("\n" + "=" * 60)
     print("Example complete!")
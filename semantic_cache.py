@@ -0,0 +1,307 @@
+"""
+Semantic search cache - reuses answers for paraphrased queries
+
+Each entry holds the embedding of a query that was answered by Cognee. A new
+query whose embedding has a cosine similarity of at least `threshold` with a
+cached one is served the cached answer. With a `ttl`, entries older than that
+many seconds are no longer served.
+
+Cached embeddings are quantized to int8 and packed row by row into one
+contiguous matrix, scanned with SimSIMD when it is installed, a Numba kernel
+when only Numba is, and NumPy otherwise. Rows that score close to the
+threshold are re-scored against the unquantized query before deciding on a hit.
+This is a partial recheck: it removes the query's quantization error, but the
+cached rows stay int8, so their quantization error remains.
+
+Given a `path`, entries are also stored in a SQLite database so they survive
+restarts and are shared by every SemanticCache opened on the same file. The
+in-memory matrix stays the search index and catches up with rows written by
+other instances before each lookup; rows older than the TTL are neither loaded
+nor kept.
+
+Public methods are thread-safe, so callers can run them off the event loop.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Rows added to the cache matrix each time it runs out of space
+GROW_BLOCK = 1024
+
+# Rows whose int8 score falls within this margin of the threshold are re-scored
+RECHECK_MARGIN = 0.02
+
+
+def quantize(embedding) -> np.ndarray:
+    """Quantize an embedding to int8 with a symmetric per-vector scale."""
+    vector = np.asarray(embedding, dtype=np.float32).ravel()
+    peak = np.abs(vector).max()
+    if not peak:
+        return np.zeros(vector.shape, dtype=np.int8)
+    return np.round(vector * (127.0 / peak)).astype(np.int8)
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_scores(query, matrix, norms_inv, query_norm_inv):
+        """Cosine similarity between an int8 query and each int8 matrix row."""
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for i in prange(matrix.shape[0]):
+            acc = 0
+            for j in range(matrix.shape[1]):
+                acc += np.int32(query[j]) * np.int32(matrix[i, j])
+            scores[i] = acc * norms_inv[i] * query_norm_inv
+        return scores
+else:
+    _cosine_scores = None
+
+
+def warmup():
+    """Compile the Numba kernel ahead of the first lookup."""
+    if simsimd is None and _cosine_scores is not None:
+        query = np.ones(4, dtype=np.int8)
+        # Same argument types as _similarities, so this is the only compilation
+        _cosine_scores(query, query[np.newaxis, :], np.ones(1, dtype=np.float32), np.float32(0.5))
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of search answers keyed by query embedding."""
+
+    def __init__(
+        self,
+        threshold: float = 0.86,
+        max_entries: int = 10000,
+        ttl: float | None = None,
+        path: str | None = None,
+    ):
+        self.threshold = threshold
+        # Zero or less disables the cache
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._reset()
+
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS query_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    embedding BLOB NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS cache_generation (value INTEGER NOT NULL);
+                INSERT INTO cache_generation (value)
+                    SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM cache_generation);
+            ''')
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(query_cache)")]
+            if "created_at" not in columns:
+                # Rows from before timestamps were stored count as expired
+                self._conn.execute("ALTER TABLE query_cache ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+            self._conn.commit()
+            self._sync()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all."""
+        return self.max_entries > 0
+
+    def _cutoff(self) -> float:
+        """Insert time before which entries have expired."""
+        return time.time() - self.ttl if self.ttl is not None else float("-inf")
+
+    def _similarities(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity between an int8 query and every cached embedding."""
+        matrix = self._matrix[:self._size]
+        if simsimd is not None:
+            distances = simsimd.cdist(query[np.newaxis, :], matrix, metric="cosine")
+            return 1.0 - np.asarray(distances, dtype=np.float32)[0]
+
+        query_norm = np.linalg.norm(query.astype(np.float32))
+        if not query_norm:
+            return np.zeros(self._size, dtype=np.float32)
+        if _cosine_scores is not None:
+            return _cosine_scores(query, matrix, self._norms_inv[:self._size], np.float32(1.0 / query_norm))
+        dots = matrix @ query.astype(np.float32)
+        return dots * self._norms_inv[:self._size] / query_norm
+
+    def _rescore(self, embedding, rows: np.ndarray) -> np.ndarray:
+        """Cosine similarity between the float query and the given int8 cached rows.
+
+        Only the query is unquantized; the rows keep their int8 rounding error.
+        """
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return np.zeros(len(rows), dtype=np.float32)
+        dots = self._matrix[rows].astype(np.float32) @ vector
+        return dots * self._norms_inv[rows] / norm
+
+    def _sync(self):
+        """Load rows written to the database since the last sync."""
+        generation = self._conn.execute("SELECT value FROM cache_generation").fetchone()[0]
+        if generation != self._generation:
+            # The database was cleared, possibly by another worker
+            self._reset()
+            self._generation = generation
+
+        rows = self._conn.execute(
+            "SELECT id, embedding, answer, created_at FROM query_cache"
+            " WHERE id > ? AND created_at > ? ORDER BY id",
+            (self._last_id, self._cutoff()),
+        )
+        for row_id, embedding, answer, created_at in rows:
+            self._insert(np.frombuffer(embedding, dtype=np.float32), json.loads(answer), created_at)
+            self._last_id = row_id
+
+    def lookup(self, embedding):
+        """Return the cached answer closest to `embedding`, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._conn is not None:
+                self._sync()
+            return self._lookup(embedding)
+
+    def _lookup(self, embedding):
+        """Search the in-memory matrix for `embedding`."""
+        if not self._size:
+            return None
+
+        query = quantize(embedding)
+        if query.shape[0] != self._matrix.shape[1]:
+            return None
+
+        similarities = self._similarities(query)
+        candidates = np.flatnonzero(similarities >= self.threshold - RECHECK_MARGIN)
+        if self.ttl is not None:
+            # Skip entries that have outlived the TTL
+            candidates = candidates[self._inserted_at[candidates] > self._cutoff()]
+        if not len(candidates):
+            return None
+
+        # Near the threshold, drop the query's quantization error by re-scoring
+        # with the float query (the rows' own int8 error remains)
+        scores = similarities[candidates]
+        near = scores < self.threshold + RECHECK_MARGIN
+        if near.any():
+            scores = scores.copy()
+            scores[near] = self._rescore(embedding, candidates[near])
+
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return self._answers[candidates[best]]
+        return None
+
+    def add(self, embedding, answer):
+        """Cache `answer` for the query with the given embedding."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if self._conn is None:
+                self._insert(embedding, answer)
+                return
+
+            vector = np.asarray(embedding, dtype=np.float32).ravel()
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO query_cache (embedding, answer, created_at) VALUES (?, ?, ?)",
+                    (vector.tobytes(), json.dumps(answer, default=str), time.time()),
+                )
+                # Keep only the newest max_entries rows that are still within the TTL
+                self._conn.execute(
+                    "DELETE FROM query_cache WHERE id <= ? OR created_at <= ?",
+                    (cursor.lastrowid - self.max_entries, self._cutoff()),
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                self._conn.rollback()
+                raise
+            self._sync()
+
+    def _insert(self, embedding, answer, inserted_at: float | None = None):
+        """Add an entry to the in-memory matrix."""
+        if not self.enabled:
+            return
+        vector = quantize(embedding)
+        norm = np.linalg.norm(vector.astype(np.float32))
+        if not norm:
+            return
+
+        if self._matrix is None or vector.shape[0] != self._matrix.shape[1]:
+            # First entry, or the embedding model changed
+            self._reset(keep_position=True)
+            self._matrix = np.empty((0, vector.shape[0]), dtype=np.int8)
+            self._norms_inv = np.empty(0, dtype=np.float32)
+            self._inserted_at = np.empty(0, dtype=np.float64)
+
+        if self._size < self.max_entries:
+            row = self._size
+            if row == self._matrix.shape[0]:
+                grow = min(GROW_BLOCK, self.max_entries - row)
+                block = np.empty((grow, vector.shape[0]), dtype=np.int8)
+                self._matrix = np.concatenate([self._matrix, block])
+                self._norms_inv = np.concatenate([self._norms_inv, np.empty(grow, dtype=np.float32)])
+                self._inserted_at = np.concatenate([self._inserted_at, np.empty(grow, dtype=np.float64)])
+            self._answers.append(answer)
+            self._size += 1
+        else:
+            # Full: overwrite the oldest entry
+            row = self._oldest
+            self._oldest = (self._oldest + 1) % self.max_entries
+            self._answers[row] = answer
+
+        self._matrix[row] = vector
+        self._norms_inv[row] = 1.0 / norm
+        self._inserted_at[row] = time.time() if inserted_at is None else inserted_at
+
+    def clear(self):
+        """Drop every cached entry, including those stored in the database."""
+        with self._lock:
+            self._reset()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM query_cache")
+                    self._conn.execute("UPDATE cache_generation SET value = value + 1")
+                    self._conn.commit()
+                except sqlite3.Error:
+                    self._conn.rollback()
+                    # The rows could not be deleted; skip past them so this
+                    # instance doesn't load them straight back
+                    self._generation = self._conn.execute("SELECT value FROM cache_generation").fetchone()[0]
+                    self._last_id = self._conn.execute("SELECT coalesce(max(id), 0) FROM query_cache").fetchone()[0]
+                    raise
+                self._sync()
+
+    def _reset(self, keep_position: bool = False):
+        """Empty the in-memory matrix."""
+        self._matrix = None
+        self._norms_inv = None
+        self._inserted_at = None
+        self._answers = []
+        self._size = 0
+        self._oldest = 0
+        if not keep_position:
+            # Generation and last row id already loaded from the database
+            self._generation = None
+            self._last_id = 0
@@ -2,47 +2,244 @@
 Cognee Web Server - FastAPI backend for the Cognee web interface
 """
 
+import asyncio
+import logging
 import os
+import threading
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
 import cognee
-from fastapi import FastAPI, HTTPException
+import orjson
+from cachetools import TTLCache
+from cognee.infrastructure.databases.vector.embeddings import get_embedding_engine
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+from neo4j import AsyncGraphDatabase
 from pydantic import BaseModel
 
+import semantic_cache
+from semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
 # Neo4j configuration from environment
 NEO4J_URL = os.getenv("GRAPH_DATABASE_URL", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("GRAPH_DATABASE_USERNAME", "neo4j")
 NEO4J_PASSWORD = os.getenv("GRAPH_DATABASE_PASSWORD", "password123")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("GRAPH_DATABASE_MAX_POOL_SIZE", "50"))
+
+# Indexes backing the document and graph lookups made by the API
+NEO4J_INDEXES = [
+    "CREATE INDEX textdoc_id IF NOT EXISTS FOR (d:TextDocument) ON (d.id)",
+    "CREATE INDEX textdoc_created IF NOT EXISTS FOR (d:TextDocument) ON (d.created_at)",
+    "CREATE INDEX chunk_idx IF NOT EXISTS FOR (c:DocumentChunk) ON (c.chunk_index)",
+]
+
+# Cypher queries, kept as constants with every varying value passed as a
+# parameter so Neo4j can reuse one cached plan per query
+
+# First chunk preview of each document, newest first
+DOCUMENTS_QUERY = '''
+    MATCH (c:DocumentChunk)-[:is_part_of]->(d:TextDocument)
+    WHERE c.chunk_index = 0
+    WITH d, trim(replace(substring(coalesce(c.text, ''), 0, 200), '\\n', ' ')) as text
+    RETURN d.id as id, d.name as name, d.created_at as created_at,
+           CASE WHEN size(text) > 150 THEN substring(text, 0, 150) + '...' ELSE text END as preview
+    ORDER BY d.created_at DESC
+'''
+
+# A document, its chunks and any TextSummary left without a chunk
+DELETE_DOCUMENT_QUERY = '''
+    // Delete chunks associated with this document
+    CALL {
+        MATCH (c:DocumentChunk)-[:is_part_of]->(:TextDocument {id: $doc_id})
+        DETACH DELETE c
+    }
+    // Delete the document itself
+    CALL {
+        MATCH (d:TextDocument {id: $doc_id})
+        DETACH DELETE d
+    }
+    // Also delete any TextSummary left without a chunk
+    CALL {
+        MATCH (s:TextSummary)
+        WHERE NOT EXISTS { MATCH (s)<-[:has_summary]-() }
+        DETACH DELETE s
+    }
+'''
+
+# One page of nodes in a stable order, optionally restricted to some node
+# types, with the display label built server-side
+GRAPH_NODES_QUERY = '''
+    MATCH (n)
+    WHERE $node_types IS NULL OR any(l IN labels(n) WHERE l IN $node_types)
+    WITH n ORDER BY elementId(n) SKIP $skip LIMIT $limit
+    WITH n,
+         coalesce([l IN labels(n) WHERE l <> '__Node__'][0], 'Unknown') AS node_type,
+         coalesce(n.name, left(n.text, 41), left(toString(coalesce(n.id, '')), 30)) AS raw_label
+    RETURN elementId(n) AS element_id, coalesce(n.id, elementId(n)) AS id, node_type,
+           CASE WHEN size(raw_label) > 40 THEN left(raw_label, 40) + '...' ELSE raw_label END AS label
+'''
+
+# Relationships between the nodes of a page, starting from an element id
+# seek on each of them
+GRAPH_EDGES_QUERY = '''
+    UNWIND $element_ids AS element_id
+    MATCH (a) WHERE elementId(a) = element_id
+    MATCH (a)-[r]->(b) WHERE elementId(b) IN $element_ids
+    RETURN coalesce(a.id, elementId(a)) as from_id, coalesce(b.id, elementId(b)) as to_id,
+           type(r) as rel_type
+    LIMIT $edge_limit
+'''
+
+# Search results cached by normalized query text; cleared whenever the
+# knowledge graph changes. A size of 0 or less disables this cache.
+SEARCH_CACHE_SIZE = max(int(os.getenv("SEARCH_CACHE_SIZE", "2048")), 0)
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "600"))
+_search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+
+# Bumped on every clear; a search only caches its answer if the generation
+# it started under is still current, so answers from before a graph change
+# never land in a freshly cleared cache
+_cache_generation = 0
+# Makes the generation check and the semantic cache write atomic with
+# respect to clearing it
+_semantic_write_lock = threading.Lock()
+
+# Search results reused for paraphrased queries whose embeddings are close,
+# expiring after the same TTL as the exact-match cache
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.86"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "10000"))
+# SQLite file keeping those results across restarts; empty to keep them in
+# memory only. Only this semantic cache is shared between workers using the
+# same file: the exact-match cache above is per process, and a clear on one
+# worker does not reach the others' exact-match caches.
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", "search_cache.db")
+_semantic_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    max_entries=SEMANTIC_CACHE_SIZE,
+    ttl=SEARCH_CACHE_TTL,
+    path=SEMANTIC_CACHE_PATH or None,
+)
+
+# Limits on concurrent Cognee work, so a burst of requests queues up instead
+# of starving the event loop and the LLM/embedding providers
+ADD_CONCURRENCY = int(os.getenv("ADD_CONCURRENCY", "8"))
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "8"))
+if ADD_CONCURRENCY < 1 or SEARCH_CONCURRENCY < 1:
+    # A zero-sized semaphore would make every add or search wait forever
+    raise ValueError("ADD_CONCURRENCY and SEARCH_CONCURRENCY must be at least 1")
+_add_semaphore = asyncio.Semaphore(ADD_CONCURRENCY)
+_search_semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+# Only one cognify runs at a time; it rebuilds the whole graph
+_cognify_lock = asyncio.Lock()
+
+
+async def clear_search_caches():
+    """Drop cached search results after the knowledge graph changes."""
+    global _cache_generation
+    _cache_generation += 1
+    _search_cache.clear()
+    try:
+        await asyncio.to_thread(_clear_semantic_cache)
+    except Exception:
+        # The graph change already happened; don't fail the request over it
+        logger.exception("Clearing the semantic cache failed")
+
 
+def _clear_semantic_cache():
+    with _semantic_write_lock:
+        _semantic_cache.clear()
 
-def get_neo4j_driver():
-    """Get a Neo4j driver using environment configuration."""
-    from neo4j import GraphDatabase
-    return GraphDatabase.driver(NEO4J_URL, auth=(NEO4J_USER, NEO4J_PASSWORD))
+
+def store_semantic_answer(embedding, response, generation: int):
+    """Write a search answer to the semantic cache, logging any failure."""
+    try:
+        with _semantic_write_lock:
+            if generation != _cache_generation:
+                return
+            _semantic_cache.add(embedding, response)
+    except Exception:
+        logger.exception("Storing search answer in the semantic cache failed")
+
+
+async def create_neo4j_indexes(driver):
+    """Create the Neo4j indexes used by the API if they don't exist yet."""
+    async with driver.session() as session:
+        for statement in NEO4J_INDEXES:
+            result = await session.run(statement)
+            await result.consume()
+
+
+async def embed_query(query: str):
+    """Embed a search query with Cognee's configured embedding engine."""
+    embeddings = await get_embedding_engine().embed_text([query])
+    return embeddings[0]
+
+
+async def fetch_records(driver, query: str, **params):
+    """Run a read query in its own session and return all records as dicts."""
+    async with driver.session() as session:
+        result = await session.run(query, **params)
+        return await result.data()
+
+
+def parse_search_results(results) -> list:
+    """Flatten the different result formats returned by cognee.search."""
+    answers = []
+    for result in results or []:
+        match result:
+            case str():
+                answers.append(result)
+            case {"search_result": list() as search_result}:
+                answers.extend(search_result)
+            case {"search_result": search_result}:
+                answers.append(str(search_result))
+            case dict():
+                pass
+            case _ if hasattr(result, 'text'):
+                answers.append(result.text)
+            case _:
+                answers.append(str(result))
+    return answers
 
 
 class AddTextRequest(BaseModel):
     text: str
 
 
+class AddBatchRequest(BaseModel):
+    texts: list[str]
+
+
 class SearchRequest(BaseModel):
     query: str
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize Cognee on startup."""
+    """Initialize Cognee and the shared Neo4j driver on startup."""
     print("Initializing Cognee...")
+    app.state.neo4j_driver = AsyncGraphDatabase.driver(
+        NEO4J_URL,
+        auth=(NEO4J_USER, NEO4J_PASSWORD),
+        max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+    )
+    try:
+        await create_neo4j_indexes(app.state.neo4j_driver)
+    except Exception as e:
+        print(f"Could not create Neo4j indexes: {e}")
+    semantic_cache.warmup()
     yield
     print("Shutting down...")
+    await app.state.neo4j_driver.close()
 
 
-app = FastAPI(title="Cognee Web Interface", lifespan=lifespan)
+app = FastAPI(title="Cognee Web Interface", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Enable CORS for local development
 app.add_middleware(
@@ -64,56 +261,102 @@ async def serve_index():
 async def add_text(request: AddTextRequest):
     """Add text to the Cognee knowledge base."""
     try:
-        await cognee.add(request.text)
+        async with _add_semaphore:
+            await cognee.add(request.text)
         return {"status": "success", "message": "Text added to knowledge base"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/add_batch")
+async def add_batch(request: AddBatchRequest):
+    """Add several texts to the Cognee knowledge base in one call."""
+    texts = [text for text in request.texts if text.strip()]
+    if not texts:
+        raise HTTPException(status_code=400, detail="No text to add")
+
+    try:
+        async with _add_semaphore:
+            await cognee.add(texts)
+        return {"status": "success", "message": f"{len(texts)} texts added to knowledge base"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/cognify")
 async def cognify():
     """Process the knowledge base to build the knowledge graph."""
     try:
-        await cognee.cognify()
+        async with _cognify_lock:
+            await cognee.cognify()
+            await clear_search_caches()
         return {"status": "success", "message": "Knowledge graph built successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/search")
-async def search(request: SearchRequest):
+async def search(request: SearchRequest, background_tasks: BackgroundTasks):
     """Search the knowledge base."""
+    key = request.query.strip().lower()
+    if key in _search_cache:
+        return _search_cache[key]
+    generation = _cache_generation
+
     try:
-        results = await cognee.search(request.query)
-
-        # Parse the results
-        answers = []
-        if results:
-            for result in results:
-                if isinstance(result, str):
-                    answers.append(result)
-                elif isinstance(result, dict):
-                    search_result = result.get('search_result', [])
-                    if isinstance(search_result, list):
-                        answers.extend(search_result)
-                    else:
-                        answers.append(str(search_result))
-                elif hasattr(result, 'text'):
-                    answers.append(result.text)
-                else:
-                    answers.append(str(result))
-
-        return {"status": "success", "results": answers}
+        async with _search_semaphore:
+            # An identical query may have been answered while this one waited
+            # for a slot (queries already running together are not merged)
+            if key in _search_cache:
+                return _search_cache[key]
+
+            embedding = None
+            if _semantic_cache.enabled:
+                try:
+                    embedding = await embed_query(request.query)
+                except Exception:
+                    # cognee.search may still work without the semantic cache
+                    logger.exception("Embedding search query failed, skipping the semantic cache")
+
+            if embedding is not None:
+                # The lookup reads SQLite, so it runs off the event loop
+                try:
+                    cached = await asyncio.to_thread(_semantic_cache.lookup, embedding)
+                except Exception:
+                    logger.exception("Semantic cache lookup failed")
+                    cached = None
+                # Not copied into the exact-match cache, which would restart its TTL
+                if cached is not None:
+                    return cached
+
+            results = await cognee.search(request.query)
+
+        response = {"status": "success", "results": parse_search_results(results)}
+        if generation == _cache_generation:
+            if SEARCH_CACHE_SIZE:
+                _search_cache[key] = response
+            if embedding is not None:
+                # Written after the response is sent, in Starlette's thread pool
+                background_tasks.add_task(store_semantic_answer, embedding, response, generation)
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/search/cache/clear")
+async def clear_search_cache():
+    """Clear cached search results."""
+    await clear_search_caches()
+    return {"status": "success", "message": "Search cache cleared"}
+
+
 @app.post("/api/reset")
 async def reset():
     """Reset the knowledge base."""
     try:
         await cognee.prune.prune_data()
         await cognee.prune.prune_system(metadata=True)
+        await clear_search_caches()
         return {"status": "success", "message": "Knowledge base reset"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -127,109 +370,90 @@ async def health():
 
 @app.get("/api/documents")
 async def list_documents():
-    """List all documents in the knowledge base."""
+    """Stream the documents in the knowledge base as NDJSON, newest first."""
+    async def stream_documents():
+        async with app.state.neo4j_driver.session() as session:
+            result = await session.run(DOCUMENTS_QUERY)
+            # Pause once the query is running; see below
+            yield b""
+            async for record in result:
+                yield orjson.dumps(record.data()) + b"\n"
+
+    # Start the generator here so query failures still become a 500. The
+    # session lives inside it, so it is closed when the stream ends or, if the
+    # client goes away first, when asyncio finalizes the started generator.
+    documents = stream_documents()
     try:
-        driver = get_neo4j_driver()
-        documents = []
-        with driver.session() as session:
-            result = session.run('''
-                MATCH (c:DocumentChunk)-[:is_part_of]->(d:TextDocument)
-                WHERE c.chunk_index = 0
-                RETURN d.id as id, d.name as name, d.created_at as created_at,
-                       substring(c.text, 0, 200) as preview
-                ORDER BY d.created_at DESC
-            ''')
-            for record in result:
-                preview = (record['preview'] or '').replace('\n', ' ').strip()
-                documents.append({
-                    "id": record["id"],
-                    "name": record["name"],
-                    "preview": preview[:150] + "..." if len(preview) > 150 else preview,
-                    "created_at": record["created_at"]
-                })
-
-        driver.close()
-        return {"documents": documents}
-    except Exception as e:
-        import traceback
-        raise HTTPException(status_code=500, detail=f"{str(e)}\n{traceback.format_exc()}")
+        await anext(documents)
+    except Exception:
+        logger.exception("Listing documents failed")
+        raise HTTPException(status_code=500, detail="Internal error")
+
+    return StreamingResponse(documents, media_type="application/x-ndjson")
+
+
+async def _delete_document_tx(tx, doc_id: str):
+    """Delete a document, its chunks and orphaned summaries in one statement."""
+    result = await tx.run(DELETE_DOCUMENT_QUERY, doc_id=doc_id)
+    await result.consume()
 
 
 @app.delete("/api/documents/{doc_id}")
 async def delete_document(doc_id: str):
     """Delete a document and its chunks from the knowledge base."""
     try:
-        driver = get_neo4j_driver()
-        with driver.session() as session:
-            # Delete chunks associated with this document
-            session.run('''
-                MATCH (c:DocumentChunk)-[:is_part_of]->(d:TextDocument {id: $doc_id})
-                DETACH DELETE c
-            ''', doc_id=doc_id)
-
-            # Delete the document itself
-            session.run('''
-                MATCH (d:TextDocument {id: $doc_id})
-                DETACH DELETE d
-            ''', doc_id=doc_id)
-
-            # Also delete any TextSummary connected to these chunks
-            session.run('''
-                MATCH (s:TextSummary)
-                WHERE NOT EXISTS { MATCH (s)<-[:has_summary]-() }
-                DETACH DELETE s
-            ''')
-
-        driver.close()
+        async with app.state.neo4j_driver.session() as session:
+            await session.execute_write(_delete_document_tx, doc_id)
+        await clear_search_caches()
+
         return {"status": "success", "message": "Document deleted"}
-    except Exception as e:
-        import traceback
-        raise HTTPException(status_code=500, detail=f"{str(e)}\n{traceback.format_exc()}")
+    except Exception:
+        logger.exception("Deleting document %s failed", doc_id)
+        raise HTTPException(status_code=500, detail="Internal error")
 
 
 @app.get("/api/graph-data")
-async def get_graph_data_api():
-    """Fetch graph data from Neo4j for visualization."""
+async def get_graph_data_api(
+    limit: int = Query(default=500, ge=1, le=5000),
+    skip: int = Query(default=0, ge=0),
+    node_types: list[str] | None = Query(default=None),
+    edge_limit: int = Query(default=1000, ge=0, le=10000),
+):
+    """Fetch a page of graph data from Neo4j for visualization."""
     try:
-        driver = get_neo4j_driver()
-        nodes = []
-        edges = []
-
-        with driver.session() as session:
-            # Get all nodes
-            result = session.run("MATCH (n) RETURN n, labels(n) as labels LIMIT 500")
-            for record in result:
-                node = record["n"]
-                labels = record["labels"]
-                node_type = next((l for l in labels if l != "__Node__"), "Unknown")
-
-                props = dict(node)
-                label = props.get("name", props.get("text", str(props.get("id", ""))[:30]))
-                if label and len(label) > 40:
-                    label = label[:40] + "..."
-
-                nodes.append({
-                    "id": props.get("id", str(node.element_id)),
-                    "label": label or node_type,
-                    "type": node_type,
-                    "title": f"Type: {node_type}\\n{label}"
-                })
-
-            # Get all relationships
-            result = session.run("MATCH (a)-[r]->(b) RETURN a.id as from_id, b.id as to_id, type(r) as rel_type LIMIT 1000")
-            for record in result:
-                edges.append({
-                    "from": record["from_id"],
-                    "to": record["to_id"],
-                    "label": record["rel_type"],
-                    "title": record["rel_type"]
-                })
-
-        driver.close()
+        driver = app.state.neo4j_driver
+        node_records = await fetch_records(
+            driver, GRAPH_NODES_QUERY, node_types=node_types, skip=skip, limit=limit
+        )
+
+        element_ids = [record["element_id"] for record in node_records]
+        edge_records = await fetch_records(
+            driver, GRAPH_EDGES_QUERY, element_ids=element_ids, edge_limit=edge_limit
+        )
+
+        nodes = [
+            {
+                "id": record["id"],
+                "label": record["label"] or record["node_type"],
+                "type": record["node_type"],
+                "title": f"Type: {record['node_type']}\\n{record['label']}"
+            }
+            for record in node_records
+        ]
+        edges = [
+            {
+                "from": record["from_id"],
+                "to": record["to_id"],
+                "label": record["rel_type"],
+                "title": record["rel_type"]
+            }
+            for record in edge_records
+        ]
+
         return {"nodes": nodes, "edges": edges}
-    except Exception as e:
-        import traceback
-        raise HTTPException(status_code=500, detail=f"{str(e)}\n{traceback.format_exc()}")
+    except Exception:
+        logger.exception("Fetching graph data failed")
+        raise HTTPException(status_code=500, detail="Internal error")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+"""
+Tests for the semantic search cache
+"""
+
+import uuid
+
+import numpy as np
+import pytest
+
+import semantic_cache
+from semantic_cache import SemanticCache
+
+DIM = 64
+
+
+@pytest.fixture
+def vectors():
+    """Random, nearly orthogonal query embeddings."""
+    return np.random.default_rng(0).normal(size=(8, DIM)).astype(np.float32)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable replacement for time.time() inside semantic_cache."""
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: now[0])
+    return now
+
+
+def paraphrase(vector, seed=1):
+    """A nearby embedding, well above the default threshold."""
+    noise = np.random.default_rng(seed).normal(size=vector.shape).astype(np.float32)
+    return vector + 0.05 * np.linalg.norm(vector) / np.sqrt(len(vector)) * noise
+
+
+def test_hit_on_paraphrase_and_miss_on_unrelated_query(vectors):
+    cache = SemanticCache()
+    cache.add(vectors[0], "answer")
+
+    assert cache.lookup(paraphrase(vectors[0])) == "answer"
+    assert cache.lookup(vectors[1]) is None
+
+
+def test_oldest_entries_are_evicted_when_full(vectors):
+    cache = SemanticCache(max_entries=3)
+    for i, vector in enumerate(vectors[:5]):
+        cache.add(vector, i)
+
+    assert len(cache) == 3
+    assert [cache.lookup(vector) for vector in vectors[:5]] == [None, None, 2, 3, 4]
+
+
+@pytest.mark.parametrize("max_entries", [0, -1])
+def test_disabled_cache_stores_nothing(tmp_path, vectors, max_entries):
+    for path in (None, str(tmp_path / "cache.db")):
+        cache = SemanticCache(max_entries=max_entries, path=path)
+        assert not cache.enabled
+        cache.add(vectors[0], "answer")
+        cache.add(vectors[0], "answer")
+        assert len(cache) == 0
+        assert cache.lookup(vectors[0]) is None
+
+
+def test_entries_expire_after_ttl(vectors, clock):
+    cache = SemanticCache(ttl=60)
+    cache.add(vectors[0], "answer")
+
+    clock[0] += 59
+    assert cache.lookup(vectors[0]) == "answer"
+    clock[0] += 2
+    assert cache.lookup(vectors[0]) is None
+
+
+def test_persisted_entries_expire_after_ttl(tmp_path, vectors, clock):
+    path = str(tmp_path / "cache.db")
+    SemanticCache(ttl=60, path=path).add(vectors[0], "answer")
+
+    assert SemanticCache(ttl=60, path=path).lookup(vectors[0]) == "answer"
+    clock[0] += 61
+    reopened = SemanticCache(ttl=60, path=path)
+    assert len(reopened) == 0
+    assert reopened.lookup(vectors[0]) is None
+
+
+def test_entries_survive_restart_and_sync_between_instances(tmp_path, vectors):
+    path = str(tmp_path / "cache.db")
+    first = SemanticCache(path=path)
+    second = SemanticCache(path=path)
+
+    first.add(vectors[0], {"results": ["a"]})
+    assert second.lookup(vectors[0]) == {"results": ["a"]}
+    assert SemanticCache(path=path).lookup(vectors[0]) == {"results": ["a"]}
+
+
+def test_answers_that_are_not_json_are_stored_as_strings(tmp_path, vectors):
+    cache = SemanticCache(path=str(tmp_path / "cache.db"))
+    value = uuid.uuid4()
+    cache.add(vectors[0], {"id": value})
+
+    assert cache.lookup(vectors[0]) == {"id": str(value)}
+
+
+def test_clear_reaches_other_instances(tmp_path, vectors):
+    path = str(tmp_path / "cache.db")
+    first = SemanticCache(path=path)
+    second = SemanticCache(path=path)
+    first.add(vectors[0], "answer")
+    assert second.lookup(vectors[0]) == "answer"
+
+    second.clear()
+    assert first.lookup(vectors[0]) is None
+    assert len(first) == 0
+
+    first.add(vectors[1], "after clear")
+    assert second.lookup(vectors[1]) == "after clear"
+
+
+def _use_backend(monkeypatch, backend):
+    """Force _similarities onto one scan backend, skipping if unavailable."""
+    if backend == "simsimd":
+        if semantic_cache.simsimd is None:
+            pytest.skip("simsimd is not installed")
+    else:
+        monkeypatch.setattr(semantic_cache, "simsimd", None)
+        if backend == "numba":
+            if semantic_cache._cosine_scores is None:
+                pytest.skip("numba is not installed")
+        else:
+            monkeypatch.setattr(semantic_cache, "_cosine_scores", None)
+
+
+@pytest.mark.parametrize("backend", ["simsimd", "numba", "numpy"])
+def test_scan_backends_agree(monkeypatch, backend):
+    rng = np.random.default_rng(2)
+    stored = rng.normal(size=(50, DIM)).astype(np.float32)
+    queries = np.concatenate([stored[:5] + 0.1 * rng.normal(size=(5, DIM)), rng.normal(size=(5, DIM))])
+
+    cache = SemanticCache()
+    for i, vector in enumerate(stored):
+        cache.add(vector, i)
+
+    # Reference: exact cosine between the int8 query and the int8 rows
+    matrix = cache._matrix[:len(cache)].astype(np.float64)
+    expected = []
+    for query in queries:
+        quantized = semantic_cache.quantize(query).astype(np.float64)
+        expected.append(matrix @ quantized / np.linalg.norm(matrix, axis=1) / np.linalg.norm(quantized))
+
+    _use_backend(monkeypatch, backend)
+    for query, reference in zip(queries, expected):
+        similarities = cache._similarities(semantic_cache.quantize(query))
+        np.testing.assert_allclose(similarities, reference, atol=1e-4)
+
+    assert [cache.lookup(query) for query in queries] == [0, 1, 2, 3, 4, None, None, None, None, None]